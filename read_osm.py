@@ -2,16 +2,21 @@ import geopandas as gpd
 import pandas as pd
 import shapely
 import os
+from concurrent.futures import ThreadPoolExecutor
 from osgeo import gdal
 
 def read_osm(fpath:str):
     layers = ['points', 'lines', 'multilinestrings', 'multipolygons', 'other_relations']
+    # pyogrio读取图层时释放GIL，各图层并发读取
+    with ThreadPoolExecutor(max_workers=len(layers)) as executor:
+        futures = {layer: executor.submit(gpd.read_file, filename=fpath, engine="pyogrio", layer=layer,
+                                          on_invalid="ignore")
+                   for layer in layers}
+
     gdfs = []
-    for layer in layers:
+    for layer, future in futures.items():
         try:
-            gdf = gpd.read_file(filename=fpath, engine="pyogrio", layer=layer, 
-                               on_invalid="ignore")
-            gdfs.append(gdf)
+            gdfs.append(future.result())
         except (shapely.errors.GEOSException, RuntimeError):
             print(f"Skipping layer {layer} due to invalid geometry")
             continue
@@ -1,9 +1,12 @@
 from dataclasses import dataclass, field
 from typing import Any, List, Tuple, Optional
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 from enum import Enum, auto
-import random
+import shapely
 from shapely.geometry import Point
+from shapely.geometry.base import BaseGeometry
 import geopandas as gpd
 import pandas as pd
 from tqdm import tqdm
@@ -12,6 +15,19 @@ import numpy as np
 
 CRS = 3857
 
+# 优先使用pyogrio读写矢量数据（有pyarrow时读写都走Arrow），未安装时退回fiona
+try:
+    import pyogrio  # noqa: F401
+    IO_ENGINE = "pyogrio"
+    try:
+        import pyarrow  # noqa: F401
+        IO_OPTIONS = {"engine": IO_ENGINE, "use_arrow": True}
+    except ImportError:
+        IO_OPTIONS = {"engine": IO_ENGINE}
+except ImportError:
+    IO_ENGINE = "fiona"
+    IO_OPTIONS = {"engine": IO_ENGINE}
+
 @dataclass
 class Fields:
     field_name: str
@@ -27,6 +43,8 @@ class GeneratorConfig:
     target_points: Optional[int] = None
     output_dir: str = "output"
     score_threshold: float = 0.5
+    batch_size: int = 4096  # 每批随机生成的候选点数量
+    seed: Optional[int] = None  # 随机数种子，设置后生成结果可复现
     fields: List[Fields] = field(default_factory=lambda: [
         Fields(field_name="site_id"),
         Fields(field_name="site_longitude"),
@@ -43,6 +61,9 @@ class ConstraintType(Enum):
     PREFER_WITHIN = auto()
     PREFER_OUTSIDE = auto()
 
+# 必须满足的硬约束类型
+HARD_CONSTRAINTS = (ConstraintType.MUST_WITHIN, ConstraintType.MUST_OUTSIDE)
+
 @dataclass
 class SpatialConstraint:
     """空间约束"""
@@ -51,93 +72,209 @@ class SpatialConstraint:
     constraint_type: ConstraintType
     priority: int = 0  # 添加优先级字段，数字越小优先级越高
 
+    def __post_init__(self):
+        # 只保留geometry列并统一坐标系，read_feature读出的数据已是CRS，无需再投影
+        self.geometry = gpd.GeoDataFrame(geometry=self.geometry.geometry, crs=self.geometry.crs)
+        if self.geometry.crs != CRS:
+            self.geometry = self.geometry.to_crs(CRS)
+
 class ConstraintValidator:
     """约束验证器"""
     def __init__(self):
         # self.constraints: List[SpatialConstraint] = []
         self.valid_area: Optional[gpd.GeoDataFrame] = None
         self.prefer_areas: List[gpd.GeoDataFrame] = []  # 存储按优先级排序的区域
+        self._pending: List[SpatialConstraint] = []  # 尚未应用到valid_area的硬约束
+        self._layered = False  # valid_area是否已按优先区域分层
         
     def add_constraint(self, constraint: SpatialConstraint):
-        """添加并处理约束"""
-        # 只保留geometry列，删除其他属性列
-        constraint_gdf = gpd.GeoDataFrame(geometry=constraint.geometry.geometry, crs=constraint.geometry.crs).to_crs(CRS)
-        
+        """添加约束，硬约束延迟到build()时统一应用"""
         # self.constraints.append(constraint)
-        if constraint.constraint_type == ConstraintType.MUST_WITHIN:
-            if self.valid_area is None:
-                self.valid_area = constraint_gdf
-            else:
-                self.valid_area = self.valid_area.overlay(constraint_gdf, how='intersection')
-        elif constraint.constraint_type == ConstraintType.MUST_OUTSIDE:
-            if self.valid_area is None:
-                raise ValueError("MUST_OUTSIDE约束需要先定义一个有效区域范围")
-            self.valid_area = self.valid_area.overlay(constraint_gdf, how='difference')
+        if constraint.constraint_type in HARD_CONSTRAINTS:
+            self._pending.append(constraint)
         elif constraint.constraint_type == ConstraintType.PREFER_WITHIN:
-            self.prefer_areas.append((constraint.priority, constraint_gdf))
-            
+            # SpatialConstraint已只保留geometry列并投影到CRS
+            self.prefer_areas.append((constraint.priority, constraint.geometry))
+            self._layered = False
+
+    def build(self):
+        """应用尚未处理的硬约束：先依次求MUST_WITHIN的交集，再减去MUST_OUTSIDE，与添加顺序无关"""
+        if not self._pending:
+            return
+        # 稳定排序，MUST_WITHIN在前，同类约束保持添加顺序
+        pending = sorted(self._pending, key=lambda c: c.constraint_type != ConstraintType.MUST_WITHIN)
+        if self.valid_area is None and pending[0].constraint_type != ConstraintType.MUST_WITHIN:
+            raise ValueError("MUST_OUTSIDE约束需要先定义一个有效区域范围")
+        
+        for constraint in pending:
+            constraint_gdf = constraint.geometry
+            if constraint.constraint_type == ConstraintType.MUST_WITHIN:
+                if self.valid_area is None:
+                    self.valid_area = constraint_gdf
+                else:
+                    self.valid_area = area_intersection(self.valid_area, constraint_gdf)
+            else:
+                # 每个多边形只减去与之相交的排除要素，避免与整个排除区域的合并结果做差集
+                self.valid_area = area_difference(self.valid_area, constraint_gdf)
+        self._pending = []
+        self._layered = False
+        
         # 合并有效区域
         # self.valid_area = gpd.GeoDataFrame(geometry=unary_union(self.valid_area.geometry), crs=CRS)
         
 
     def get_valid_area(self) -> gpd.GeoDataFrame:
         """返回有效区域，按优先级排序，优先级高的区域放到前面"""
+        self.build()
         if self.valid_area is None:
             raise ValueError("没有设置任何约束条件")
-            
+        
+        # 分层只在首次调用（或新增优先区域后）计算一次，之后的差集更新保留每个多边形的layer
+        if not self._layered:
+            self.valid_area = self._layer_valid_area()
+            self._layered = True
+        # 分层结果按layer顺序拼接，update_valid_area原位替换、删除和拆分都不改变行的相对顺序，
+        # 因此无需每次重新排序，直接返回缓存的结果
+        return self.valid_area
+    
+    def _layer_valid_area(self) -> gpd.GeoDataFrame:
+        """按优先区域对有效区域分层，layer越小优先级越高"""
         # 按优先级排序prefer_areas
         self.prefer_areas.sort(key=lambda x: x[0])
         
-        # 如果没有优先区域，直接返回有效区域
-        if not self.prefer_areas:
-            return self.valid_area.explode(ignore_index=True)
-            
         # 创建分层的有效区域
         layered_areas = []
-        remaining_area = self.valid_area.copy()
+        remaining_area = self.valid_area.drop(columns='layer', errors='ignore')
         
         # 按优先级处理每个prefer区域
-        for _, prefer_area in self.prefer_areas:
+        for layer, (_, prefer_area) in enumerate(self.prefer_areas):
             # 与当前剩余区域相交
-            current_layer = gpd.overlay(remaining_area, prefer_area, how='intersection')
+            current_layer = area_intersection(remaining_area, prefer_area)
             if not current_layer.empty:
-                layered_areas.append(current_layer)
+                layered_areas.append(current_layer.assign(layer=layer))
             # 更新剩余区域
-            remaining_area = gpd.overlay(remaining_area, prefer_area, how='difference')
+            remaining_area = area_difference(remaining_area, prefer_area)
             
-        # 添加剩余区域作为最后一层
+        # 添加剩余区域作为最后一层，没有优先区域时整个有效区域即为唯一一层
         if not remaining_area.empty:
-            layered_areas.append(remaining_area)
+            layered_areas.append(remaining_area.assign(layer=len(self.prefer_areas)))
+        
+        if not layered_areas:
+            return gpd.GeoDataFrame({'layer': []}, geometry=[], crs=CRS)
             
         # 合并所有层
-        return pd.concat(layered_areas, ignore_index=True).explode(ignore_index=True)
+        return explode_parts(pd.concat(layered_areas, ignore_index=True))
     
-    def update_valid_area(self, excluded_area: gpd.GeoDataFrame):
-        """更新有效区域，去除已生成点的缓冲区"""
-        self.valid_area = gpd.overlay(self.valid_area, excluded_area, how='difference').explode(ignore_index=True)
+    def debug_dump(self, path: str, layer: str = "valid_area"):
+        """把当前有效区域写出到GPKG，便于检查中间结果"""
+        self.get_valid_area().to_file(path, driver="GPKG", layer=layer, **IO_OPTIONS)
+
+    def update_valid_area(self, excluded_area: "gpd.GeoDataFrame | BaseGeometry"):
+        """更新有效区域，去除已生成点的缓冲区，excluded_area可以是数据框或单个几何"""
+        if isinstance(excluded_area, gpd.GeoDataFrame):
+            excluded_area = unary_union(excluded_area.geometry.values)
+        # 通过空间索引找到与缓冲区相交的多边形，只对这部分做差集，其余多边形原样保留
+        touched = self.valid_area.sindex.query(excluded_area, predicate='intersects')
+        if len(touched) == 0:
+            return
+        # 在几何数组上原位替换被裁剪的多边形，不再每次concat重建整个DataFrame
+        geoms = np.array(self.valid_area.geometry.values)
+        geoms[touched] = shapely.difference(geoms[touched], excluded_area)
+        valid_area = self.valid_area.set_geometry(geoms)[~shapely.is_empty(geoms)]
+        # 只有裁剪产生多部件几何时才需要拆分
+        if (shapely.get_num_geometries(geoms[touched]) > 1).any():
+            valid_area = explode_parts(valid_area)
+        self.valid_area = valid_area
 
 
 class GeoFeatureManager:
     """地理要素管理器"""
-    def __init__(self, file: str):
+    def __init__(self, file: str, cache_dir: Optional[str] = None):
         self.file = Path(file)
         if not self.file.exists():
             raise FileNotFoundError(f"矢量数据文件未找到: {file}")
+        # 缓存目录，设置后读取结果（已投影、已buffer）会以GeoParquet格式缓存
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
         
     def read_feature(self, 
                     where: Optional[str]=None, 
                     layer: Optional[str] = None, 
-                    buffer_size: Optional[float] = None) -> gpd.GeoDataFrame:
-        """读取地理要素"""
+                    buffer_size: Optional[float] = None,
+                    quad_segs: int = 16,
+                    simplify_tol: Optional[float] = None,
+                    n_jobs: Optional[int] = None) -> gpd.GeoDataFrame:
+        """
+        读取地理要素
+        
+        :param quad_segs: buffer每四分之一圆的线段数
+        :param simplify_tol: 设置后在buffer之前按该容差（米）简化几何，减少后续叠加运算的顶点数
+        :param n_jobs: 大于1时按fid分段并行读取
+        """
+        cache_path = self._cache_path(where=where, layer=layer, buffer_size=buffer_size, quad_segs=quad_segs,
+                                      simplify_tol=simplify_tol)
+        if cache_path is not None and cache_path.exists():
+            try:
+                return gpd.read_parquet(cache_path)
+            except Exception as e:
+                print(f"读取缓存 {cache_path} 失败，重新读取源文件: {e}")
         try:
-            gdf = gpd.read_file(self.file,where=where,layer=layer).to_crs(CRS)
+            if n_jobs and n_jobs > 1 and IO_ENGINE == "pyogrio":
+                gdf = self._read_parallel(where, layer, n_jobs)
+            else:
+                gdf = gpd.read_file(self.file, where=where, layer=layer, **IO_OPTIONS)
+            gdf = gdf.to_crs(CRS)
+            if simplify_tol is not None:
+                gdf['geometry'] = shapely.simplify(gdf.geometry.values, simplify_tol, preserve_topology=True)
             if buffer_size is not None:
-                # 对每个几何体单独进行buffer操作
-                gdf['geometry'] = gdf['geometry'].buffer(buffer_size)
-            return gdf
+                # 直接对底层几何数组做矢量化buffer，一次C循环处理所有几何体
+                gdf['geometry'] = shapely.buffer(gdf.geometry.values, buffer_size, quad_segs=quad_segs)
         except Exception as e:
             print(f"读取图层 {layer} 失败: {e}")
             return gpd.GeoDataFrame(geometry=[], crs=CRS)
+        if cache_path is not None:
+            self._write_cache(gdf, cache_path)
+        return gdf
+
+    def _read_parallel(self, where: Optional[str], layer: Optional[str], n_jobs: int) -> gpd.GeoDataFrame:
+        """把fid范围切成n_jobs段，每段加上fid过滤条件后并行读取，再按顺序合并"""
+        fids = pyogrio.read_dataframe(self.file, layer=layer, columns=[], read_geometry=False, fid_as_index=True).index
+        if fids.empty:
+            return gpd.read_file(self.file, where=where, layer=layer, **IO_OPTIONS)
+        fid_column = pyogrio.read_info(self.file, layer=layer).get("fid_column") or "FID"
+        edges = np.linspace(fids.min(), fids.max() + 1, n_jobs + 1).astype(int)
+        
+        def read_range(lo: int, hi: int) -> gpd.GeoDataFrame:
+            condition = f"{fid_column} >= {lo} AND {fid_column} < {hi}"
+            if where:
+                condition = f"({where}) AND {condition}"
+            return gpd.read_file(self.file, where=condition, layer=layer, **IO_OPTIONS)
+        
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            parts = list(executor.map(read_range, edges[:-1], edges[1:]))
+        return pd.concat(parts, ignore_index=True)
+
+    def _cache_path(self, **params) -> Optional[Path]:
+        """根据源文件路径、修改时间和读取参数生成缓存文件路径，源文件（含附属文件）变化后自动失效"""
+        if self.cache_dir is None:
+            return None
+        stats = [(path.suffix, path.stat().st_mtime_ns, path.stat().st_size) for path in self._source_files()]
+        key = repr((str(self.file.resolve()), stats, sorted(params.items())))
+        return self.cache_dir / f"{self.file.stem}-{hashlib.md5(key.encode()).hexdigest()}.parquet"
+
+    def _source_files(self) -> List[Path]:
+        """源文件及其附属文件，shapefile的属性、投影和编码分别保存在.dbf、.prj、.cpg中"""
+        if self.file.suffix.lower() != ".shp":
+            return [self.file]
+        sidecars = [self.file.with_suffix(ext) for ext in (".shx", ".dbf", ".prj", ".cpg")]
+        return [self.file] + [path for path in sidecars if path.exists()]
+
+    def _write_cache(self, gdf: gpd.GeoDataFrame, cache_path: Path):
+        """写入缓存，失败时只打印提示，不影响本次读取结果"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            gdf.to_parquet(cache_path)
+        except Exception as e:
+            print(f"写入缓存 {cache_path} 失败: {e}")
 
 class PointGenerator:
     """点位生成器"""
@@ -145,8 +282,12 @@ class PointGenerator:
         self.config = config
         self.validator = validator
         Path(config.output_dir).mkdir(exist_ok=True)
+        self._rng = np.random.default_rng(config.seed)
+        # 单位圆顶点模板，顶点数与shapely默认buffer(quad_segs=16)一致
+        thetas = np.linspace(0, 2 * np.pi, 64, endpoint=False)
+        self._unit_circle = np.column_stack([np.cos(thetas), np.sin(thetas)])
     
-    def create_ring(self, point: Tuple[float, float]) -> gpd.GeoDataFrame:
+    def create_ring(self, point: Tuple[float, float]) -> BaseGeometry:
         """创建环形区域"""
         if isinstance(point, gpd.GeoDataFrame):
             point = Point(point.geometry.iloc[0].x, point.geometry.iloc[0].y)
@@ -155,46 +296,63 @@ class PointGenerator:
         else:
             point = Point(point[0], point[1])
             
-        outer_circle = point.buffer(self.config.max_distance)
-        inner_circle = point.buffer(self.config.min_distance)
-        ring = outer_circle.difference(inner_circle)
-        return gpd.GeoDataFrame(geometry=[ring], crs=3857)
+        # 外圈与内圈都由单位圆模板平移得到，直接构造带洞多边形，省去两次buffer和difference
+        center = (point.x, point.y)
+        ring = shapely.polygons(
+            self._unit_circle * self.config.max_distance + center,
+            holes=[self._unit_circle * self.config.min_distance + center]
+        )
+        return ring
     
     def create_hexagon(self, point: Tuple[float, float])->gpd.GeoDataFrame:
         pass
 
-    def create_circle(self, point: Tuple[float, float], radius: float)->gpd.GeoDataFrame:
-        return gpd.GeoDataFrame(
-            geometry=[point.buffer(radius)], 
-            crs=3857
-        )
+    def create_circle(self, point: Tuple[float, float], radius: float) -> BaseGeometry:
+        # 缩放平移单位圆模板得到顶点，不必每次buffer都重新计算三角函数
+        # 直接返回shapely几何，循环中不再为每个点位构造GeoDataFrame
+        coords = self._unit_circle * radius + (point.x, point.y)
+        return shapely.polygons(coords)
         
         
     def get_random_point(self, search_area: gpd.GeoDataFrame) -> Optional[Point]:
-        # 按照DataFrame的顺序处理，因为get_valid_area已经按优先级排序了
-        search_area = search_area.explode(ignore_index=True)
+        # get_valid_area已按优先级排序，优先在最高优先级的一层中取点，
+        # 该层尝试max_attempts次仍未命中时再退到下一层
+        layers = search_area['layer'].to_numpy()
+        for layer in np.unique(layers):
+            point = self._sample_layer(search_area.geometry.values[layers == layer])
+            if point is not None:
+                return point
+        return None
+
+    def _sample_layer(self, geoms: np.ndarray) -> Optional[Point]:
+        """在一层多边形内均匀取点，总尝试次数不超过max_attempts，未命中返回None"""
+        # 预处理候选多边形，已预处理过的几何不会重复处理
+        shapely.prepare(geoms)
+        
+        # 按外包矩形面积加权选取多边形，再在矩形内均匀取点并拒绝落在多边形外的点，
+        # 这样接受的点在整层有效区域内是均匀分布的
+        bounds = shapely.bounds(geoms)
+        cdf = np.cumsum((bounds[:, 2] - bounds[:, 0]) * (bounds[:, 3] - bounds[:, 1]))
+        cdf /= cdf[-1]
         
-        # 从高优先级区域开始尝试
-        for idx in range(len(search_area)):
-            current_poly = search_area.iloc[idx]
-            bounds = current_poly.geometry.bounds
+        # 批量生成候选点，一次矢量化判断整批是否落在各自的多边形内
+        for _ in range(0, self.config.max_attempts, self.config.batch_size):
+            idx = np.minimum(np.searchsorted(cdf, self._rng.random(self.config.batch_size)), len(cdf) - 1)
+            xs = self._rng.uniform(bounds[idx, 0], bounds[idx, 2])
+            ys = self._rng.uniform(bounds[idx, 1], bounds[idx, 3])
             
-            # 在当前多边形中尝试生成点
-            # local_attempts = min(1000, self.config.max_attempts // len(search_area))
-            while True:
-                point = Point(random.uniform(bounds[0], bounds[2]), 
-                             random.uniform(bounds[1], bounds[3]))
-                
-                if current_poly.geometry.contains(point):
-                    return point
-                
+            mask = shapely.contains_xy(geoms[idx], xs, ys)
+            if mask.any():
+                i = np.argmax(mask)
+                return Point(xs[i], ys[i])
         return None
 
     def generate(self) -> gpd.GeoDataFrame:
         """生成点位"""
+        # 已选点位按x、y两列坐标保存，最后一次性构造Point；放在try之前，出错时也能返回已生成的点位
+        xs, ys = [], []
         try:
             valid_area = self.validator.get_valid_area()
-            valid_points = []
             
             # 根据是否设置目标点位数创建不同格式的进度条
             if self.config.target_points:
@@ -211,7 +369,7 @@ class PointGenerator:
                 )
             
             while not valid_area.empty:
-                if self.config.target_points and len(valid_points) >= self.config.target_points:
+                if self.config.target_points and len(xs) >= self.config.target_points:
                     break
                     
                 new_point = self.get_random_point(valid_area)
@@ -219,7 +377,8 @@ class PointGenerator:
                     print("\n无法在剩余区域中生成有效点位")
                     break
                     
-                valid_points.append(new_point)
+                xs.append(new_point.x)
+                ys.append(new_point.y)
                 new_circle = self.create_circle(new_point, self.config.min_distance)
                 self.validator.update_valid_area(new_circle)
                 valid_area = self.validator.get_valid_area()
@@ -228,15 +387,19 @@ class PointGenerator:
             
             pbar.close()
 
-            valid_area.to_file(f"{self.config.output_dir}/valid_area.gpkg", driver="GPKG", layer="valid_area")  
-
-            points_gdf = gpd.GeoDataFrame(geometry=valid_points, crs=3857)
+            self.validator.debug_dump(f"{self.config.output_dir}/valid_area.gpkg")
 
-            return points_gdf.to_crs(4326)
+            return self._points_gdf(xs, ys)
                 
         except Exception as e:
             print(f"生成点位错误: {e}")
-            return gpd.GeoDataFrame(geometry=valid_points, crs=3857).to_crs(4326)
+            return self._points_gdf(xs, ys)
+
+    @staticmethod
+    def _points_gdf(xs: List[float], ys: List[float]) -> gpd.GeoDataFrame:
+        """由坐标列构造点位数据框并转换为WGS84"""
+        points = shapely.points(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        return gpd.GeoDataFrame(geometry=points, crs=3857).to_crs(4326)
         
 class FieldsGenerator:
     def __init__(self, gdf: gpd.GeoDataFrame, config: GeneratorConfig):
@@ -274,13 +437,18 @@ class FieldsGenerator:
             raise ValueError(f"指定的字��� {height_field} 在高度数据中不存在")
 
         height_gdf = height_gdf.to_crs(self.gdf.crs)
-        joined_gdf = gpd.sjoin(self.gdf, height_gdf, how="left", predicate="within")
-        self.gdf[self.height_field] = joined_gdf[height_field]
+        # 直接用STRtree查询点所在的高度面，不做完整的sjoin
+        tree = shapely.STRtree(height_gdf.geometry.values)
+        left, right = tree.query(self.gdf.geometry.values, predicate="within")
+        heights = np.full(len(self.gdf), np.nan)
+        heights[left] = height_gdf[height_field].to_numpy(dtype=float)[right]
+        self.gdf[self.height_field] = heights
 
     def add_coordinates(self):
         """添加经纬度坐标字段"""
-        self.gdf[self.longitude_field] = self.gdf.geometry.x
-        self.gdf[self.latitude_field] = self.gdf.geometry.y
+        coords = shapely.get_coordinates(self.gdf.geometry.values)
+        self.gdf[self.longitude_field] = coords[:, 0]
+        self.gdf[self.latitude_field] = coords[:, 1]
 
     def add_custom_fields(self):
         """
@@ -304,6 +472,43 @@ class FieldsGenerator:
         self.add_custom_fields()  # 添加其他自定义字段
         return self.gdf
 
+def clip_difference(geoms: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """逐个几何减去与之相交的others，不相交的几何原样返回"""
+    result = geoms.copy()
+    left, right = shapely.STRtree(others).query(geoms, predicate='intersects')
+    if not len(left):
+        return result
+    # 按left分组，每组只合并与该几何相交的少量要素
+    order = np.argsort(left, kind='stable')
+    left, right = left[order], right[order]
+    starts = np.flatnonzero(np.r_[True, left[1:] != left[:-1]])
+    for i, group in zip(left[starts], np.split(right, starts[1:])):
+        result[i] = shapely.difference(geoms[i], unary_union(others[group]))
+    return result
+
+def clip_intersection(geoms: np.ndarray, others: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """求geoms与others两两相交的面状部分，返回结果几何及其对应的geoms下标"""
+    left, right = shapely.STRtree(others).query(geoms, predicate='intersects')
+    parts, part_idx = shapely.get_parts(shapely.intersection(geoms[left], others[right]), return_index=True)
+    # 与overlay的keep_geom_type一致，只保留多边形，丢弃边界接触产生的线和点
+    keep = shapely.get_type_id(parts) == shapely.GeometryType.POLYGON
+    return parts[keep], left[part_idx[keep]]
+
+def explode_parts(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """用shapely.get_parts拆分多部件几何，属性列按来源行复制，代替GeoDataFrame.explode"""
+    parts, rows = shapely.get_parts(gdf.geometry.values, return_index=True)
+    return gdf.iloc[rows].reset_index(drop=True).set_geometry(parts)
+
+def area_intersection(area: gpd.GeoDataFrame, other: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """区域求交，保留area的属性列，代替gpd.overlay(how='intersection')"""
+    geoms, rows = clip_intersection(np.array(area.geometry.values), np.array(other.geometry.values))
+    return area.iloc[rows].reset_index(drop=True).set_geometry(geoms)
+
+def area_difference(area: gpd.GeoDataFrame, other: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """区域求差，保留area的属性列，代替gpd.overlay(how='difference')"""
+    geoms = clip_difference(np.array(area.geometry.values), np.array(other.geometry.values))
+    return area.set_geometry(geoms)[~shapely.is_empty(geoms)]
+
 def equal_epsg(gdf1: gpd.GeoDataFrame, gdf2: gpd.GeoDataFrame)->bool:
     """判断两个GeoDataFrame的坐标系是否相同"""
     return gdf1.crs == gdf2.crs
@@ -318,10 +523,11 @@ def main():
         )
         
         # 初始化管理器和读取数据
-        buildings = GeoFeatureManager("/mnt/d/wang/长沙建筑数据/长沙建筑轮廓数据/长沙-20241111-v2.gpkg")
-        geo_manager = GeoFeatureManager("osm_data/长沙osm-面.gpkg")
-        line = GeoFeatureManager("osm_data/长沙osm-多线.gpkg")
-        boundary = GeoFeatureManager("osm_data/长沙市区县.shp")
+        cache_dir = "cache"
+        buildings = GeoFeatureManager("/mnt/d/wang/长沙建筑数据/长沙建筑轮廓数据/长沙-20241111-v2.gpkg", cache_dir)
+        geo_manager = GeoFeatureManager("osm_data/长沙osm-面.gpkg", cache_dir)
+        line = GeoFeatureManager("osm_data/长沙osm-多线.gpkg", cache_dir)
+        boundary = GeoFeatureManager("osm_data/长沙市区县.shp", cache_dir)
         
         print("正在读取地理数据...")
         buildings = buildings.read_feature(
@@ -332,11 +538,13 @@ def main():
         )
         roads = line.read_feature(
             where="highway IS NOT NULL",
-            buffer_size=60
+            buffer_size=60,
+            quad_segs=4
         )
         water = geo_manager.read_feature(
             where="natural='water'",
-            buffer_size=40
+            buffer_size=40,
+            quad_segs=4
         )
 
         authority_boundary = boundary.read_feature(
@@ -383,12 +591,14 @@ def main():
         point_gdf = generator.generate()
 
         field=FieldsGenerator(point_gdf,config=config)
-        field.add_height(gpd.read_file("./osm_data/长沙-20241111-v2.gpkg"))
+        field.add_height(gpd.read_file("./osm_data/长沙-20241111-v2.gpkg", **IO_OPTIONS))
         gdf=field.apply_fields()
-        gdf.to_crs(4326).to_file(
+        # generate已返回EPSG:4326结果，直接写出，无需再次投影
+        gdf.to_file(
                 f"{config.output_dir}/points.gpkg",
                 driver="GPKG",
-                layer="points"
+                layer="points",
+                **IO_OPTIONS
             )
 
 